@@ -1,12 +1,13 @@
 from modules.camera_module import CameraModule
-from modules.eye_detection_module import EyeDetection
+from modules.eye_detection_module import get_detector
 from modules.drowsiness_logic_module import DrowsinessDetector
 from modules.alarm_module import AlarmSystem
 from modules.database_module import DatabaseManager
+from modules import config
 
 # Initialize modules
 camera = CameraModule()
-eye = EyeDetection()
+eye = get_detector()
 logic = DrowsinessDetector()
 alarm = AlarmSystem()
 db = DatabaseManager()
@@ -34,7 +35,7 @@ while camera.is_running():
 
         # If face not detected
         if left_eye is None or right_eye is None:
-            camera.draw_text(frame, "Face Not Detected", (20, 40), (0, 165, 255))  # ORANGE
+            camera.draw_label(frame, "Face Not Detected", (20, 40), (0, 165, 255))  # ORANGE
             camera.display_frame(frame)
             continue
 
@@ -51,12 +52,16 @@ while camera.is_running():
             color = (0, 255, 0)   # GREEN
 
         # Display status & EAR
-        camera.draw_text(frame, f"Status: {status}", (20, 40), color)
-        camera.draw_text(frame, f"EAR: {round(ear, 3)}", (20, 80), (0, 0, 0))
+        camera.draw_label(frame, f"Status: {status}", (20, 40), color)
+        camera.draw_value(frame, "EAR:", ear, (20, 80), (0, 0, 0))
 
-        # Draw eye landmarks
-        eye.draw_eye_points(frame, left_eye)
-        eye.draw_eye_points(frame, right_eye)
+        # Draw eye landmarks (drawing happens in-place, no frame copy)
+        if config.DRAW_LANDMARKS:
+            eye.draw_eye_points(frame, left_eye)
+            eye.draw_eye_points(frame, right_eye)
+
+        if config.DRAW_BOUNDING_BOXES:
+            eye.draw_bounding_box(frame, landmarks)
 
         # Alarm + Database
         if drowsy:
@@ -1,4 +1,20 @@
+import os
+import threading
+import time
+
 import cv2
+import numpy as np
+
+from modules import config
+from modules import pixel_ops
+
+# Turn on OpenCV's vectorized code paths and size its thread pool to
+# physical cores (its default of one thread per logical CPU thrashes
+# the cache on SMT machines)
+cv2.setUseOptimized(True)
+cv2.setNumThreads(config.OPENCV_THREADS
+                  or max(1, (os.cpu_count() or 2) // 2))
+
 
 class CameraModule:
     """
@@ -6,12 +22,56 @@ class CameraModule:
     initialization, frame capture, processing, and release.
     """
 
-    def __init__(self, camera_index=0):
+    def __init__(self, camera_index=0, drain=False):
         self.camera_index = camera_index
         self.cap = None
         self.running = False
         self.frame_count = 0
 
+        # Fallback for capture backends that ignore CAP_PROP_BUFFERSIZE:
+        # when True, blocking reads grab() through any buffered frames
+        # so the returned frame is always the freshest one
+        self.drain = drain
+        self._fast_grab_s = 0.25 / 30  # refined from CAP_PROP_FPS on start
+
+        # Threaded capture: reader thread keeps the newest frame here.
+        # The Event gives a race-free shutdown signal. Reads rotate
+        # through a small pool of reused buffers; the reader never
+        # writes into the published frame or the one the consumer got
+        # from its latest read_frame(), so the most recent frame can be
+        # held without copying - anything older must be .copy()'d.
+        self._reader_thread = None
+        self._frame_cond = threading.Condition()
+        self._latest_frame = None
+        self._frame_seq = 0       # bumped by the reader per new frame
+        self._last_seq_read = 0   # last sequence the consumer saw
+        self._held_frame = None   # buffer the consumer last received
+        self._stop_event = threading.Event()
+
+        # Reusable destination for grayscale conversion
+        self._gray_buf = None
+
+        # Reusable destination for YUYV->BGR when capturing raw frames
+        self._bgr_buf = None
+
+        # Ring of integer-ns frame timestamps; stats are computed from
+        # it after the fact, so timing adds ~10 ns per frame instead of
+        # float arithmetic in the loop
+        self._ts_ring = np.zeros(240, np.int64)
+        self._ts_count = 0
+
+        # Counter for the every-Nth-frame keyboard poll
+        self._key_poll_counter = 0
+
+        # Prerendered text sprites keyed by (text, color): FreeType
+        # rasterization runs once per distinct label, after which
+        # drawing a label is a masked copy
+        self._label_sprites = {}
+
+        # Persistent 64-byte-aligned frame buffer for the blocking
+        # read path (sized after the first frame)
+        self._frame_buf = None
+
     def start_camera(self):
         """Start the camera."""
         self.cap = cv2.VideoCapture(self.camera_index)
@@ -19,33 +79,258 @@ class CameraModule:
         if not self.cap.isOpened():
             raise Exception("Camera not accessible")
 
+        # Keep at most one frame in the driver queue so reads return
+        # the live frame, not a stale buffered one (up to ~100 ms old
+        # with the default 4-frame buffer at 30 FPS)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        if config.CAMERA_FOURCC:
+            fourcc = cv2.VideoWriter_fourcc(*config.CAMERA_FOURCC)
+            self.cap.set(cv2.CAP_PROP_FOURCC, fourcc)
+
+            if int(self.cap.get(cv2.CAP_PROP_FOURCC)) != fourcc:
+                print(f"Camera ignored FOURCC {config.CAMERA_FOURCC}")
+
+        if config.CAMERA_WIDTH and config.CAMERA_HEIGHT:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.CAMERA_WIDTH)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.CAMERA_HEIGHT)
+
+        if config.CAPTURE_RAW_YUYV:
+            # Take the implicit YUYV->BGR conversion out of cap.read();
+            # _decode_yuyv does one explicit pass per decoded frame
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+
+        # "Fast grab" threshold for drain mode: a buffered frame comes
+        # back well under a quarter of a frame interval, a live one
+        # takes a full interval
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self._fast_grab_s = 0.25 / (fps if fps and fps > 0 else 30)
+
         self.running = True
+
+        if config.USE_THREADING:
+            self._stop_event.clear()
+            self._reader_thread = threading.Thread(
+                target=self._reader_loop, daemon=True)
+            self._reader_thread.start()
+
         print("Camera started")
 
-    def read_frame(self):
-        """Read a frame from camera."""
+    def _reader_loop(self):
+        """Continuously read frames so the main loop never blocks on I/O.
+
+        Reads rotate through three preallocated aligned buffers instead
+        of letting OpenCV allocate a frame per read: the consumer can
+        hold the latest frame through a full processing pass while the
+        reader fills the other two.
+        """
+        buffers = None
+        index = 0
+
+        while not self._stop_event.is_set():
+            if buffers is None:
+                # First read sizes the buffer pool
+                ret, frame = self.cap.read()
+
+                if not ret:
+                    continue
+
+                buffers = [self._make_aligned_buffer(frame.shape)
+                           for _ in range(3)]
+                np.copyto(buffers[0], frame)
+            else:
+                # Never write into the published buffer or the one the
+                # consumer is holding; with three buffers and at most
+                # two busy, a free one always exists
+                with self._frame_cond:
+                    busy = (self._latest_frame, self._held_frame)
+
+                while buffers[index] is busy[0] or buffers[index] is busy[1]:
+                    index = (index + 1) % len(buffers)
+
+                ret, frame = self.cap.read(buffers[index])
+
+                if not ret:
+                    continue
+
+            with self._frame_cond:
+                self._latest_frame = buffers[index]
+                self._frame_seq += 1
+                self._frame_cond.notify_all()
+
+            # Timestamp here, once per captured frame, so get_fps()
+            # reports the camera's rate rather than the consumer's
+            self._note_frame()
+            index = (index + 1) % len(buffers)
+
+    def _decode_yuyv(self, frame):
+        """One fused YUYV->BGR pass into a reused buffer.
+
+        Runs at consumption time, so frames that are skipped or
+        replaced before being read are never converted at all.
+
+        With CAP_PROP_CONVERT_RGB off, the raw frame's shape depends
+        on the backend: (h, w, 2), a flat (1, h*w*2), or a packed
+        (h, 2w) all occur in the wild. Anything that isn't already
+        (h, w, 2) is reshaped to it using the capture dimensions the
+        driver reports.
+        """
+        h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+
+        if frame.shape[:2] != (h, w) or frame.ndim != 3 or frame.shape[2] != 2:
+            if frame.size != h * w * 2:
+                raise Exception(
+                    f"Unexpected raw YUYV frame shape {frame.shape} for a "
+                    f"{w}x{h} capture - this backend does not deliver YUYV "
+                    "this way; set CAPTURE_RAW_YUYV = False in "
+                    "modules/config.py")
+            frame = frame.reshape(h, w, 2)
+
+        if self._bgr_buf is None or self._bgr_buf.shape[:2] != (h, w):
+            self._bgr_buf = np.empty((h, w, 3), np.uint8)
+
+        cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_YUYV, dst=self._bgr_buf)
+        return self._bgr_buf
+
+    @staticmethod
+    def _make_aligned_buffer(shape):
+        """Allocate a 64-byte-aligned uint8 buffer of the given shape.
+
+        Aligned, reused frames let OpenCV's (and pixel_ops') SIMD paths
+        use aligned loads and avoid a fresh allocation per read.
+        """
+        size = int(np.prod(shape))
+        raw = np.empty(size + 64, np.uint8)
+        offset = (-raw.ctypes.data) & 63
+        return raw[offset:offset + size].reshape(shape)
+
+    def read_frame(self, decode=True):
+        """Read a frame from camera.
+
+        With decode=False the stream is only advanced via cap.grab()
+        (no demux/decode into a numpy array) and None is returned -
+        callers skipping detection on a frame should use this and keep
+        their previous result.
+
+        Returned frames live in reused buffers. The most recently
+        returned frame is safe to hold - the reader never writes into
+        it - but it becomes fair game as soon as the next read_frame()
+        call returns, so keeping more than the latest frame requires a
+        .copy().
+        """
         if not self.running:
             return None
 
-        ret, frame = self.cap.read()
-
-        if not ret:
-            print("Frame capture failed")
+        if not decode:
+            if not config.USE_THREADING:
+                self.cap.grab()
             return None
 
-        self.frame_count += 1
+        if config.USE_THREADING:
+            # Block until the reader publishes a frame newer than the
+            # one returned last time - otherwise the caller's loop
+            # would spin flat out re-processing the same stale frame
+            with self._frame_cond:
+                while self._frame_seq == self._last_seq_read and self.running:
+                    if not self._frame_cond.wait(timeout=1):
+                        return None
+
+                frame = self._latest_frame
+                self._last_seq_read = self._frame_seq
+                self._held_frame = frame
+
+            if frame is None:
+                return None
+
+            # The reader loop already timestamped this frame when it
+            # captured it - don't count it again here
+            if config.CAPTURE_RAW_YUYV:
+                frame = self._decode_yuyv(frame)
+
+            return frame
+        else:
+            # Discard backlog cheaply: grab() advances the stream
+            # without decoding a frame
+            for _ in range(config.FRAME_SKIP):
+                self.cap.grab()
+
+            if self.drain:
+                # Buffered frames come back from grab() almost
+                # instantly; a live frame takes a frame interval.
+                # Grab until one costs real time - but at most one
+                # more grab than the driver queue can hold, so a fast
+                # source (file, capture card) where every grab beats
+                # the threshold can't trap us in the loop.
+                max_grabs = int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE) or 4) + 1
+
+                for _ in range(max_grabs):
+                    started = time.monotonic()
+                    if not self.cap.grab():
+                        print("Frame capture failed")
+                        return None
+                    if time.monotonic() - started > self._fast_grab_s:
+                        break
+
+                if self._frame_buf is not None:
+                    ret, frame = self.cap.retrieve(self._frame_buf)
+                else:
+                    ret, frame = self.cap.retrieve()
+
+                if not ret:
+                    print("Frame capture failed")
+                    return None
+
+                if self._frame_buf is None:
+                    self._frame_buf = self._make_aligned_buffer(frame.shape)
+
+                if config.CAPTURE_RAW_YUYV:
+                    frame = self._decode_yuyv(frame)
+
+                self._note_frame()
+                return frame
+
+            if self._frame_buf is not None:
+                ret, frame = self.cap.read(self._frame_buf)
+            else:
+                ret, frame = self.cap.read()
+
+            if not ret:
+                print("Frame capture failed")
+                return None
+
+            if self._frame_buf is None:
+                self._frame_buf = self._make_aligned_buffer(frame.shape)
+
+        if config.CAPTURE_RAW_YUYV:
+            frame = self._decode_yuyv(frame)
+
+        self._note_frame()
         return frame
 
     def resize_frame(self, frame, width=640, height=480):
-        """Resize frame for processing."""
-        try:
-            return cv2.resize(frame, (width, height))
-        except:
+        """Resize frame for processing (no-op if already that size)."""
+        if frame.shape[1] == width and frame.shape[0] == height:
             return frame
 
+        return cv2.resize(frame, (width, height))
+
     def convert_to_gray(self, frame):
-        """Convert frame to grayscale."""
-        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        """Convert frame to grayscale.
+
+        Writes into a cached buffer that is overwritten on the next
+        call. Uses the compiled luma kernel from pixel_ops when Numba
+        is available (vectorized for the host CPU at JIT time),
+        otherwise OpenCV.
+        """
+        if self._gray_buf is None or self._gray_buf.shape != frame.shape[:2]:
+            self._gray_buf = np.empty(frame.shape[:2], np.uint8)
+
+        if pixel_ops.HAVE_NUMBA:
+            return pixel_ops.to_gray_luma(frame, self._gray_buf)
+
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+        return self._gray_buf
 
     def flip_frame(self, frame):
         """Flip frame horizontally."""
@@ -56,6 +341,72 @@ class CameraModule:
         cv2.putText(frame, text, position,
                     cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
 
+    def _get_label_sprite(self, text, color):
+        """Render a label once and cache the sprite plus its mask."""
+        key = (text, color)
+        cached = self._label_sprites.get(key)
+
+        if cached is None:
+            (tw, th), baseline = cv2.getTextSize(
+                text, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)
+
+            canvas = np.zeros((th + baseline, tw, 3), np.uint8)
+            cv2.putText(canvas, text, (0, th),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+
+            # Mask comes from a white rendering so dark colors
+            # (including black) still produce full coverage
+            stencil = np.zeros((th + baseline, tw), np.uint8)
+            cv2.putText(stencil, text, (0, th),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, 255, 2)
+            mask = (stencil > 0)[:, :, None]
+            cached = (canvas, mask, th)
+            self._label_sprites[key] = cached
+
+        return cached
+
+    def draw_label(self, frame, text, position=(20, 40), color=(0,255,0)):
+        """Draw a recurring label (status strings etc.) on frame.
+
+        Same signature and placement as draw_text, but the glyphs are
+        rasterized only the first time a (text, color) pair is seen;
+        every later frame just blits the cached sprite. Use draw_text
+        for strings that change every frame.
+        """
+        sprite, mask, th = self._get_label_sprite(text, color)
+
+        x, y = position
+        top = y - th
+        h, w = sprite.shape[:2]
+
+        if top < 0 or x < 0 or top + h > frame.shape[0] or x + w > frame.shape[1]:
+            # Partially off-frame - let putText handle the clipping
+            self.draw_text(frame, text, position, color)
+            return
+
+        np.copyto(frame[top:top + h, x:x + w], sprite, where=mask)
+
+    def draw_value(self, frame, prefix, value, position=(20, 80),
+                   color=(0,255,0), decimals=3):
+        """Draw a labeled numeric readout using cached glyph sprites.
+
+        The value's digits change every frame, but the glyph set is
+        just 0-9, '.', and '-', so each character is rasterized once
+        and then composited from the sprite cache - no per-frame
+        FreeType work even for dynamic numbers.
+        """
+        x, y = position
+
+        if prefix:
+            sprite, _, _ = self._get_label_sprite(prefix, color)
+            self.draw_label(frame, prefix, (x, y), color)
+            x += sprite.shape[1] + 8
+
+        for ch in f"{value:.{decimals}f}":
+            sprite, _, _ = self._get_label_sprite(ch, color)
+            self.draw_label(frame, ch, (x, y), color)
+            x += sprite.shape[1] + 2
+
     def draw_rectangle(self, frame, x, y, w, h):
         """Draw rectangle (optional use)."""
         cv2.rectangle(frame, (x,y), (x+w,y+h), (255,0,0), 2)
@@ -65,22 +416,63 @@ class CameraModule:
         cv2.imshow(window_name, frame)
 
     def get_key(self):
-        """Get key press."""
+        """Get key press (non-blocking).
+
+        Only asks the window system for events every
+        config.KEY_POLL_INTERVAL calls; skipped calls report no key.
+        """
+        self._key_poll_counter += 1
+        if self._key_poll_counter % config.KEY_POLL_INTERVAL != 0:
+            return 255  # same value waitKey(1) & 0xFF yields for "no key"
+
+        # pollKey (OpenCV >= 4.5) processes GUI events and returns
+        # immediately; waitKey(1) blocks for at least a millisecond
+        if hasattr(cv2, "pollKey"):
+            return cv2.pollKey() & 0xFF
+
         return cv2.waitKey(1) & 0xFF
 
     def is_running(self):
         """Check if camera is active."""
         return self.running
 
+    def _note_frame(self):
+        """Record a frame timestamp (integer ns) and bump the count."""
+        self._ts_ring[self._ts_count % self._ts_ring.shape[0]] = time.monotonic_ns()
+        self._ts_count += 1
+        self.frame_count += 1
+
     def get_frame_count(self):
-        """Return number of frames processed."""
+        """Return number of frames captured (every camera frame in
+        threaded mode, decoded frames otherwise)."""
         return self.frame_count
 
+    def get_fps(self):
+        """Effective capture FPS over the recent timestamp ring."""
+        n = min(self._ts_count, self._ts_ring.shape[0])
+
+        if n < 2:
+            return 0.0
+
+        if self._ts_count <= self._ts_ring.shape[0]:
+            ts = self._ts_ring[:n]
+        else:
+            i = self._ts_count % self._ts_ring.shape[0]
+            ts = np.concatenate([self._ts_ring[i:], self._ts_ring[:i]])
+
+        return float(1e9 / np.diff(ts).mean())
+
     def stop_camera(self):
         """Release camera."""
+        self.running = False
+        self._stop_event.set()
+
+        if self._reader_thread is not None:
+            self._reader_thread.join(timeout=1)
+            self._reader_thread = None
+
         if self.cap:
             self.cap.release()
 
         cv2.destroyAllWindows()
-        self.running = False
         print("Camera stopped")
\ No newline at end of file
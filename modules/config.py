@@ -0,0 +1,132 @@
+# Central configuration for the drowsiness detection pipeline.
+
+# Drawing / annotation flags.
+# Disabling these removes all per-frame drawing work (rectangles, circles,
+# text) from the detection loop, which helps on low-end machines.
+DRAW_LANDMARKS = True       # draw eye landmark points on the frame
+DRAW_BOUNDING_BOXES = False  # draw the face bounding box on the frame
+
+# Detection resolution.
+# FaceMesh is run on a copy downscaled to this width (aspect ratio
+# preserved); landmarks are normalized so they map back to the full
+# frame with no extra work. A width target instead of a fixed ratio
+# means a 1080p source is reduced just as aggressively as a 640x480
+# one, while already-small inputs (e.g. tracked face crops) are left
+# at native size for landmark precision. Set to 0 to always detect at
+# native resolution.
+DETECTION_WIDTH = 320
+
+# Detection cadence.
+# While a face is being tracked, run the full FaceMesh pass only every
+# Nth frame and reuse the previous landmarks in between. Detection runs
+# on every frame while no face is found, so recovery is immediate.
+# 1 disables skipping. The driver's face moves very little between
+# adjacent frames at 30 FPS, so small values are safe.
+DETECT_EVERY = 2
+
+# Camera pixel format (FOURCC).
+# MJPG asks the webcam to deliver hardware-compressed JPEG frames,
+# cutting USB bandwidth roughly 10x vs raw YUYV; OpenCV decodes them
+# with libjpeg-turbo. Many cheap webcams can only reach 30 FPS in
+# MJPEG. Set to None to keep the driver default.
+CAMERA_FOURCC = "MJPG"
+
+# Raw YUYV capture.
+# When True, OpenCV's implicit YUYV->BGR conversion inside cap.read()
+# is disabled (CAP_PROP_CONVERT_RGB=0) and the camera module does one
+# explicit fused conversion per decoded frame instead - a single pass
+# over the pixels under our control, into a reused buffer. Only
+# meaningful for cameras delivering YUYV; leave off with MJPEG
+# (CAMERA_FOURCC), which already decodes straight to BGR.
+CAPTURE_RAW_YUYV = False
+
+# Capture resolution requested from the driver.
+# Face detection gains nothing from 1080p; asking the camera for
+# 640x480 directly avoids shipping extra pixels over USB and makes the
+# per-frame resize in the main loop a no-op. Set either to 0 to keep
+# the driver default.
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+
+# Frame skipping (non-threaded capture only).
+# Number of frames to discard between decoded frames. Skipped frames
+# are advanced with cap.grab(), which moves the stream pointer without
+# the demux/decode into a numpy array, so skipping is nearly free.
+# 0 decodes every frame. Ignored when USE_THREADING is on - the reader
+# thread already delivers only the newest frame.
+FRAME_SKIP = 0
+
+# Face ROI tracking.
+# While a face is tracked, FaceMesh runs only on a padded crop around
+# the previous face bounding box instead of the whole frame (far fewer
+# pixels per pass). A full-frame pass still runs every
+# ROI_REFRESH_EVERY detections, and immediately whenever the crop
+# loses the face. ROI_PADDING is the margin added around the box as a
+# fraction of its size.
+TRACK_ROI = True
+ROI_PADDING = 0.25
+ROI_REFRESH_EVERY = 30
+
+# FaceMesh confidence thresholds.
+# FaceMesh only re-runs its internal (heavy) face detector when the
+# landmark tracker's confidence drops below MIN_TRACKING_CONFIDENCE;
+# raising it re-detects more often, lowering it tracks longer and
+# cheaper. MIN_DETECTION_CONFIDENCE gates initial face acceptance.
+MIN_DETECTION_CONFIDENCE = 0.5
+MIN_TRACKING_CONFIDENCE = 0.5
+
+# Landmark model selection.
+# True loads FaceMesh's heavier attention model, which adds refined
+# iris landmarks. EAR only uses the six eye-contour points per eye,
+# which the base model already provides, so the cheaper model is the
+# default. Enable only if iris data is ever needed.
+REFINE_LANDMARKS = False
+
+# EAR history length.
+# Per-frame EAR samples kept for averaging and the analytics graph.
+# Bounded so a long drive cannot grow memory without limit
+# (1800 samples is about two minutes at 15 FPS).
+EAR_HISTORY_MAX = 1800
+
+# Cheap pre-detection gates.
+# A 32x32 gray thumbnail of the tracked face region is used for two
+# checks before running FaceMesh: frames with mean intensity outside
+# [BRIGHTNESS_MIN, BRIGHTNESS_MAX] are unreliable (too dark or blown
+# out) and are treated as no-face; frames whose sum of absolute
+# differences against the thumbnail from the last real FaceMesh pass
+# is below MOTION_SAD_THRESHOLD reuse that result. The reference
+# thumbnail is NOT advanced on skipped frames, so slow movements like
+# eyes gradually closing accumulate until they trip the threshold, and
+# MOTION_GATE_MAX_SKIPS caps consecutive skips so the model always
+# re-runs within a bounded number of frames regardless. Set
+# MOTION_SAD_THRESHOLD to 0 to disable the motion gate.
+BRIGHTNESS_MIN = 20
+BRIGHTNESS_MAX = 235
+MOTION_SAD_THRESHOLD = 1500
+MOTION_GATE_MAX_SKIPS = 5
+
+# Camera capture threading.
+# When enabled, a daemon thread reads frames continuously and
+# read_frame() returns the newest one instead of blocking on the
+# camera driver (USB cameras can stall 10-30 ms per read).
+USE_THREADING = True
+
+# Keyboard polling cadence.
+# get_key() only asks HighGUI for events every Nth call; at 30 FPS a
+# value of 3 still gives ~100 ms key response, imperceptible to a
+# human, while dropping two thirds of the window-system round trips.
+# 1 polls on every frame.
+KEY_POLL_INTERVAL = 3
+
+# OpenCV internal thread pool.
+# 0 sizes the pool to half the logical CPUs (roughly the physical core
+# count with SMT on) - OpenCV's default of one thread per logical CPU
+# tends to thrash the cache on hyper-threaded machines. Any other
+# value is used as-is.
+OPENCV_THREADS = 0
+
+# GPU offload.
+# When True and OpenCL is available, frame preprocessing (resize and
+# color conversion) runs through OpenCV's Transparent API on the GPU
+# (integrated GPUs included). Falls back to the CPU path otherwise.
+ENABLE_GPU = False
@@ -1,5 +1,8 @@
+import math
 import time
-import numpy as np
+from collections import deque
+
+from modules import config
 
 class DrowsinessDetector:
     """
@@ -13,28 +16,31 @@ class DrowsinessDetector:
         self.start_time = None
         self.is_drowsy = False
         self.current_ear = 0
-        self.history = []
+        # Bounded so memory stays flat on long drives
+        self.history = deque(maxlen=config.EAR_HISTORY_MAX)
 
     def calculate_distance(self, p1, p2):
         """Calculate distance between two points."""
-        return np.linalg.norm([p1.x - p2.x, p1.y - p2.y])
+        # math.hypot avoids the per-call list + ndarray that
+        # np.linalg.norm would allocate (six calls per frame)
+        return math.hypot(p1.x - p2.x, p1.y - p2.y)
 
     def calculate_ear(self, eye):
         """Compute EAR."""
-        try:
-            p1,p2,p3,p4,p5,p6 = eye
+        if eye is None or len(eye) != 6:
+            return 0
 
-            v1 = self.calculate_distance(p2,p6)
-            v2 = self.calculate_distance(p3,p5)
-            h  = self.calculate_distance(p1,p4)
+        p1, p2, p3, p4, p5, p6 = eye
 
-            if h == 0:
-                return 0
+        v1 = self.calculate_distance(p2, p6)
+        v2 = self.calculate_distance(p3, p5)
+        h = self.calculate_distance(p1, p4)
 
-            return (v1 + v2) / (2*h)
-        except:
+        if h == 0:
             return 0
 
+        return (v1 + v2) / (2 * h)
+
     def average_ear(self, left, right):
         """Average EAR."""
         left_val = self.calculate_ear(left)
@@ -48,10 +54,12 @@ class DrowsinessDetector:
     def check_drowsiness(self, ear):
         """Check drowsiness."""
         if ear < self.ear_threshold:
+            # monotonic() cannot jump backwards with wall-clock
+            # adjustments, which would corrupt the closure duration
             if self.start_time is None:
-                self.start_time = time.time()
+                self.start_time = time.monotonic()
             else:
-                duration = time.time() - self.start_time
+                duration = time.monotonic() - self.start_time
                 if duration >= self.time_threshold:
                     self.is_drowsy = True
         else:
@@ -1,5 +1,23 @@
 import cv2
 import mediapipe as mp
+import numpy as np
+
+from modules import config
+
+# Enable OpenCV's SSE/AVX optimized code paths for resize/cvtColor
+cv2.setUseOptimized(True)
+
+
+class _Point:
+    """Lightweight landmark point used when remapping ROI-relative
+    landmarks back to full-frame normalized coordinates."""
+
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
 
 
 class EyeDetection:
@@ -17,32 +35,172 @@ class EyeDetection:
         self.face_mesh = self.mp_face_mesh.FaceMesh(
             static_image_mode=False,
             max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
+            refine_landmarks=config.REFINE_LANDMARKS,
+            min_detection_confidence=config.MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=config.MIN_TRACKING_CONFIDENCE
         )
 
         # Eye landmark indices (MediaPipe)
         self.left_eye_indices = [33, 160, 158, 133, 153, 144]
         self.right_eye_indices = [362, 385, 387, 263, 373, 380]
 
+        # Reusable buffers for the per-frame resize and BGR->RGB
+        # conversion (lazily sized on the first frame)
+        self._small_buf = None
+        self._rgb_buf = None
+        self._rgb_full_buf = None
+
+        # Frame-skip state: last detection result is reused between
+        # full FaceMesh passes (see config.DETECT_EVERY)
+        self._frame_index = 0
+        self._last_result = None
+
+        # Frame dimensions are constant once the camera is open; cached
+        # on the first processed frame so the draw helpers don't unpack
+        # frame.shape on every call
+        self._frame_w = None
+        self._frame_h = None
+
+        # 32x32 gray thumbnail of the face region at the last real
+        # FaceMesh pass, for the brightness/motion gates; and how many
+        # consecutive frames the motion gate has skipped
+        self._last_thumb = None
+        self._gate_skips = 0
+
+        # ROI tracking: pixel box (x0, y0, x1, y1) around the last
+        # detected face; FaceMesh runs only on this crop while it holds
+        self._roi = None
+        self._detect_count = 0
+
+        # OpenCL (Transparent API) preprocessing on the GPU, if enabled
+        # and available
+        self._use_opencl = config.ENABLE_GPU and cv2.ocl.haveOpenCL()
+        if self._use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+
     def convert_to_rgb(self, frame):
         """
-        Convert BGR frame to RGB (required for MediaPipe)
+        Convert BGR frame to RGB (required for MediaPipe).
+        Returns a cached buffer that is overwritten on the next call.
         """
-        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self._rgb_full_buf is None or self._rgb_full_buf.shape != frame.shape:
+            self._rgb_full_buf = np.empty_like(frame)
 
-    def get_landmarks(self, frame):
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_full_buf)
+        return self._rgb_full_buf
+
+    def _preprocess(self, frame):
         """
-        Detect face landmarks from frame
+        Downscale and convert a BGR frame to the RGB image FaceMesh
+        consumes. Landmarks are normalized, so they stay valid for the
+        original resolution. Runs on the GPU via OpenCL when enabled.
         """
-        rgb_frame = self.convert_to_rgb(frame)
-        results = self.face_mesh.process(rgb_frame)
+        scale = 1.0
+        if config.DETECTION_WIDTH:
+            scale = min(1.0, config.DETECTION_WIDTH / frame.shape[1])
+
+        if self._use_opencl:
+            img = cv2.UMat(frame)
+            if scale < 1.0:
+                img = cv2.resize(img, (0, 0), fx=scale, fy=scale,
+                                 interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(img, cv2.COLOR_BGR2RGB).get()
+
+        if scale < 1.0:
+            h, w = frame.shape[:2]
+            small_h, small_w = int(h * scale), int(w * scale)
+
+            if self._small_buf is None or self._small_buf.shape[:2] != (small_h, small_w):
+                self._small_buf = np.empty((small_h, small_w, 3), np.uint8)
+
+            cv2.resize(frame, (small_w, small_h), dst=self._small_buf,
+                       interpolation=cv2.INTER_AREA)
+            frame = self._small_buf
+
+        if self._rgb_buf is None or self._rgb_buf.shape != frame.shape:
+            self._rgb_buf = np.empty_like(frame)
+
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        return self._rgb_buf
+
+    def _detect(self, frame):
+        """
+        Single fused pass: preprocess, run FaceMesh, extract eye
+        points. While a face is tracked, only a padded crop around the
+        previous face box is processed; a full-frame pass runs every
+        config.ROI_REFRESH_EVERY detections or when the crop misses.
+        """
+        self._detect_count += 1
+
+        if (config.TRACK_ROI and self._roi is not None
+                and self._detect_count % config.ROI_REFRESH_EVERY != 0):
+            x0, y0, x1, y1 = self._roi
+            result = self._run_mesh(frame[y0:y1, x0:x1],
+                                    (x0, y0, x1 - x0, y1 - y0))
+            if result[0] is not None:
+                return result
+
+            # Crop lost the face - retry on the whole frame
+            self._roi = None
+
+        return self._run_mesh(frame, None)
+
+    def _run_mesh(self, img, roi):
+        """Run FaceMesh on img; roi gives the crop origin/size in full-
+        frame pixels when img is a crop, or None for a full frame."""
+        results = self.face_mesh.process(self._preprocess(img))
+
+        if not results.multi_face_landmarks:
+            return None, None, None
+
+        landmarks = results.multi_face_landmarks[0].landmark
+
+        if roi is not None:
+            landmarks = self._remap_landmarks(landmarks, roi)
+
+        left_eye, right_eye = self.get_eye_points(landmarks)
+        self._update_roi(landmarks)
+
+        return landmarks, left_eye, right_eye
+
+    def _remap_landmarks(self, landmarks, roi):
+        """Map crop-relative normalized landmarks back to full-frame
+        normalized coordinates."""
+        x0, y0, roi_w, roi_h = roi
+        sx, sy = roi_w / self._frame_w, roi_h / self._frame_h
+        ox, oy = x0 / self._frame_w, y0 / self._frame_h
+
+        return [_Point(ox + p.x * sx, oy + p.y * sy, p.z) for p in landmarks]
+
+    def _update_roi(self, landmarks):
+        """Refresh the tracked face box from the latest landmarks."""
+        if not config.TRACK_ROI or self._frame_w is None:
+            return
 
-        if results.multi_face_landmarks:
-            return results.multi_face_landmarks[0].landmark
+        coords = np.array([(p.x, p.y) for p in landmarks])
+        x0, y0 = coords.min(axis=0)
+        x1, y1 = coords.max(axis=0)
 
-        return None
+        pad_x = (x1 - x0) * config.ROI_PADDING
+        pad_y = (y1 - y0) * config.ROI_PADDING
+
+        w, h = self._frame_w, self._frame_h
+        box = np.array([(x0 - pad_x) * w, (y0 - pad_y) * h,
+                        (x1 + pad_x) * w, (y1 + pad_y) * h]).astype(int)
+        np.clip(box, 0, [w, h, w, h], out=box)
+
+        # A degenerate box is useless as a crop
+        if box[2] - box[0] < 32 or box[3] - box[1] < 32:
+            self._roi = None
+        else:
+            self._roi = tuple(box)
+
+    def get_landmarks(self, frame):
+        """
+        Detect face landmarks from frame
+        """
+        landmarks, _, _ = self._detect(frame)
+        return landmarks
 
     def get_eye_points(self, landmarks):
         """
@@ -63,7 +221,9 @@ class EyeDetection:
         if eye_points is None:
             return frame
 
-        height, width, _ = frame.shape
+        width, height = self._frame_w, self._frame_h
+        if width is None:
+            height, width = frame.shape[:2]
 
         for point in eye_points:
             x = int(point.x * width)
@@ -72,6 +232,34 @@ class EyeDetection:
 
         return frame
 
+    @staticmethod
+    def _landmark_bbox(landmarks, width, height):
+        """Pixel bounding box (x_min, y_min, x_max, y_max) of a
+        landmark set - derived from the mesh, no detector pass."""
+        coords = np.array([(p.x, p.y) for p in landmarks])
+        coords *= (width, height)
+
+        x_min, y_min = coords.min(axis=0).astype(int)
+        x_max, y_max = coords.max(axis=0).astype(int)
+
+        return x_min, y_min, x_max, y_max
+
+    def detect_all(self, frame):
+        """
+        Fused single-pass detection: returns the face bounding box,
+        the landmarks, and both eye point sets from one FaceMesh
+        invocation. The box comes from the landmark extent, so callers
+        needing box + landmarks no longer trigger detection twice.
+        """
+        landmarks, left_eye, right_eye = self.process(frame)
+
+        if landmarks is None:
+            return None, None, None, None
+
+        bbox = self._landmark_bbox(landmarks, self._frame_w, self._frame_h)
+
+        return bbox, landmarks, left_eye, right_eye
+
     def draw_bounding_box(self, frame, landmarks):
         """
         Optional: Draw bounding box around face
@@ -79,34 +267,104 @@ class EyeDetection:
         if landmarks is None:
             return frame
 
-        h, w, _ = frame.shape
-        x_coords = [int(p.x * w) for p in landmarks]
-        y_coords = [int(p.y * h) for p in landmarks]
-
-        x_min, x_max = min(x_coords), max(x_coords)
-        y_min, y_max = min(y_coords), max(y_coords)
+        h, w = frame.shape[:2]
+        x_min, y_min, x_max, y_max = self._landmark_bbox(landmarks, w, h)
 
         cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), (255, 0, 0), 2)
 
         return frame
 
+    def _make_thumb(self, frame):
+        """32x32 gray thumbnail of the tracked face region (whole
+        frame while no face box is known) for the pre-detection gates.
+        Using the face crop keeps the eyes a meaningful fraction of
+        the thumbnail instead of a couple of pixels."""
+        if self._roi is not None:
+            x0, y0, x1, y1 = self._roi
+            frame = frame[y0:y1, x0:x1]
+
+        return cv2.cvtColor(
+            cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA),
+            cv2.COLOR_BGR2GRAY)
+
     def process(self, frame):
         """
         Main pipeline function:
         - Detect landmarks
         - Extract eye points
+
+        While a face is tracked, the full FaceMesh pass only runs every
+        config.DETECT_EVERY frames; the cached result is returned for
+        the frames in between.
         """
-        landmarks = self.get_landmarks(frame)
+        self._frame_index += 1
+
+        if self._frame_w is None:
+            self._frame_h, self._frame_w = frame.shape[:2]
+
+        if (self._last_result is not None
+                and config.DETECT_EVERY > 1
+                and self._frame_index % config.DETECT_EVERY != 0):
+            return self._last_result
+
+        # Cheap gates on a 32x32 gray thumbnail of the tracked face
+        # region: skip FaceMesh when the scene is too dark / blown out,
+        # or unchanged since the last frame that actually ran the model
+        thumb = self._make_thumb(frame)
+        brightness = float(thumb.mean())
+
+        if brightness < config.BRIGHTNESS_MIN or brightness > config.BRIGHTNESS_MAX:
+            self._last_thumb = None
+            self._last_result = None
+            return None, None, None
+
+        # _last_thumb is only refreshed after a real FaceMesh pass, so
+        # slow changes (eyes gradually closing) accumulate against the
+        # last detected state instead of vanishing frame-to-frame; the
+        # skip cap bounds staleness even below the SAD threshold
+        if (config.MOTION_SAD_THRESHOLD > 0
+                and self._last_result is not None
+                and self._last_thumb is not None
+                and self._gate_skips < config.MOTION_GATE_MAX_SKIPS
+                and int(cv2.absdiff(thumb, self._last_thumb).sum()) < config.MOTION_SAD_THRESHOLD):
+            self._gate_skips += 1
+            return self._last_result
+
+        landmarks, left_eye, right_eye = self._detect(frame)
+        self._gate_skips = 0
 
         if landmarks is None:
+            self._last_thumb = None
+            self._last_result = None
             return None, None, None
 
-        left_eye, right_eye = self.get_eye_points(landmarks)
+        # Recompute at the post-detection ROI so later comparisons use
+        # the same crop the gate will take
+        self._last_thumb = self._make_thumb(frame)
 
-        return landmarks, left_eye, right_eye
+        self._last_result = (landmarks, left_eye, right_eye)
+        return self._last_result
 
     def release(self):
         """
         Release MediaPipe resources (optional cleanup)
         """
-        self.face_mesh.close()
\ No newline at end of file
+        self.face_mesh.close()
+
+
+_detector = None
+
+
+def get_detector():
+    """
+    Shared EyeDetection instance. Building the MediaPipe graph (model
+    load, TFLite interpreter allocation) costs hundreds of
+    milliseconds, so entry points should reuse this instead of
+    constructing their own.
+    """
+    global _detector
+
+    if _detector is None:
+        _detector = EyeDetection()
+
+    return _detector
\ No newline at end of file
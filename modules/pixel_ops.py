@@ -0,0 +1,64 @@
+"""
+Compiled per-pixel helpers for the camera pipeline.
+
+Any custom pixel transform added to the pipeline (lighting
+normalization, adaptive gamma, ROI masking, custom gray weighting)
+should live here as an explicit loop compiled with Numba, rather than
+as a chain of whole-array NumPy expressions that allocate temporaries
+and triple memory traffic.
+
+Numba is optional: when it is not installed the functions fall back to
+NumPy equivalents, so nothing else in the project needs to care.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+if HAVE_NUMBA:
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def to_gray_luma(frame, out):
+        """BGR frame -> gray using integer BT.601 luma weights."""
+        h, w = out.shape
+        for i in prange(h):
+            for j in range(w):
+                b = frame[i, j, 0]
+                g = frame[i, j, 1]
+                r = frame[i, j, 2]
+                out[i, j] = (29 * b + 150 * g + 77 * r) >> 8
+        return out
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def clip_and_scale(img, out, lo, hi):
+        """Clip img to [lo, hi] and stretch to the full 0-255 range."""
+        h, w = out.shape
+        span = hi - lo
+        for i in prange(h):
+            for j in range(w):
+                v = img[i, j]
+                if v < lo:
+                    v = lo
+                elif v > hi:
+                    v = hi
+                out[i, j] = (v - lo) * 255 // span
+        return out
+
+else:
+
+    def to_gray_luma(frame, out):
+        """BGR frame -> gray using integer BT.601 luma weights."""
+        f = frame.astype(np.uint16)
+        np.copyto(out, ((29 * f[:, :, 0] + 150 * f[:, :, 1] + 77 * f[:, :, 2]) >> 8).astype(np.uint8))
+        return out
+
+    def clip_and_scale(img, out, lo, hi):
+        """Clip img to [lo, hi] and stretch to the full 0-255 range."""
+        clipped = np.clip(img, lo, hi).astype(np.uint16)
+        np.copyto(out, ((clipped - lo) * 255 // (hi - lo)).astype(np.uint8))
+        return out
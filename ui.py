@@ -4,11 +4,15 @@ from kivy.graphics.texture import Texture
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
 
+from collections import deque
+
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
 
-from modules.eye_detection_module import EyeDetection
+from modules import config
+
+from modules.eye_detection_module import get_detector
 from modules.drowsiness_logic_module import DrowsinessDetector
 from modules.alarm_module import AlarmSystem
 
@@ -253,7 +257,7 @@ class GraphScreen(MDScreen):
 class DMSApp(MDApp):
 
     def build(self):
-        self.eye = EyeDetection()
+        self.eye = get_detector()
         self.logic = DrowsinessDetector()
         self.alarm = AlarmSystem()
 
@@ -261,7 +265,8 @@ class DMSApp(MDApp):
 
         self.running = False
         self.alert_count = 0
-        self.ear_history = []
+        self.ear_history = deque(maxlen=config.EAR_HISTORY_MAX)
+        self._cam_texture = None
 
         root = Builder.load_string(KV)
         self.dashboard = root.get_screen("dashboard")
@@ -317,10 +322,15 @@ class DMSApp(MDApp):
 
         frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
-        texture = Texture.create(size=(frame.shape[1], frame.shape[0]), colorfmt='rgb')
-        texture.blit_buffer(frame.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
+        # Create the texture once and blit into it - recreating a GPU
+        # texture every frame is a large hidden per-frame allocation
+        size = (frame.shape[1], frame.shape[0])
+        if self._cam_texture is None or self._cam_texture.size != size:
+            self._cam_texture = Texture.create(size=size, colorfmt='rgb')
+            screen.ids.cam.texture = self._cam_texture
 
-        screen.ids.cam.texture = texture
+        self._cam_texture.blit_buffer(frame.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
+        screen.ids.cam.canvas.ask_update()
 
     # ---------------- ADVANCED GRAPH ----------------
     def show_graph(self):
@@ -339,18 +349,25 @@ class DMSApp(MDApp):
         graph_screen.ids.max_ear.text = f"Max EAR: {max_ear:.3f}"
         graph_screen.ids.alert_score.text = f"Alert Score: {alert_score}"
 
-        # PLOT
-        plt.figure(figsize=(6, 3))
+        # PLOT (rendered straight to a texture - no PNG round-trip
+        # through the filesystem)
+        fig = plt.figure(figsize=(6, 3))
         plt.plot(data, linewidth=2)
         plt.title("EAR Trend Analysis")
         plt.xlabel("Time")
         plt.ylabel("EAR")
         plt.grid()
+        plt.tight_layout()
 
-        plt.savefig("graph.png")
-        plt.close()
+        fig.canvas.draw()
+        w, h = fig.canvas.get_width_height()
+        img = np.frombuffer(fig.canvas.tostring_rgb(), dtype=np.uint8).reshape(h, w, 3)
+        img = np.flipud(img)
+        plt.close(fig)
 
-        graph_screen.ids.graph_img.source = "graph.png"
+        tex = Texture.create(size=(w, h), colorfmt='rgb')
+        tex.blit_buffer(img.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
+        graph_screen.ids.graph_img.texture = tex
 
     # ---------------- CLEAN EXIT ----------------
     def on_stop(self):